@@ -41,13 +41,15 @@ def list_stem_maps():
 # =============================================================================
 # Machine endpoint consumers
 # =============================================================================
-def create_machine(stem_map_id, camera_max_dist, camera_fov):
+def create_machine(stem_map_id, camera_max_dist, camera_fov, noise=None, sensors=()):
     response = requests.post(
         f"{BASE_URL}/machines",
         json={
             "stem_map_id": stem_map_id,
             "camera_max_dist": camera_max_dist,
             "camera_fov": camera_fov,
+            "noise": noise,
+            "sensors": list(sensors),
         },
     )
     return response.json()
@@ -93,3 +95,76 @@ def move_machine(machine_id, distance, rotation):
 def get_local_stems(machine_id):
     response = requests.get(f"{BASE_URL}/machines/{machine_id}/local-stems")
     return response.json()
+
+
+def move_fleet(moves):
+    response = requests.patch(
+        f"{BASE_URL}/machines/move",
+        json={
+            "moves": [
+                {"machine_id": machine_id, "distance": distance, "rotation": rotation}
+                for machine_id, distance, rotation in moves
+            ]
+        },
+    )
+
+    return response.json()
+
+
+def get_local_stem_trials(machine_id, n_trials):
+    response = requests.get(
+        f"{BASE_URL}/machines/{machine_id}/local-stems/trials",
+        params={"n_trials": n_trials},
+    )
+    return response.json()
+
+
+def set_sensors(machine_id, sensors):
+    response = requests.put(
+        f"{BASE_URL}/machines/{machine_id}/sensors", json={"sensors": list(sensors)}
+    )
+    return response.json()
+
+
+def get_sensor_stems(machine_id):
+    response = requests.get(f"{BASE_URL}/machines/{machine_id}/sensor-stems")
+    return response.json()
+
+
+def check_clearance(machine_id, radius, moves):
+    response = requests.post(
+        f"{BASE_URL}/machines/{machine_id}/clearance",
+        json={
+            "radius": radius,
+            "moves": [
+                {"distance": distance, "rotation": rotation}
+                for distance, rotation in moves
+            ],
+        },
+    )
+
+    return response.json()
+
+
+def get_nearest_stems(machine_id, k=1, cut=None, dbh_min=None, dbh_max=None):
+    params = {"k": k, "cut": cut, "dbh_min": dbh_min, "dbh_max": dbh_max}
+    response = requests.get(
+        f"{BASE_URL}/machines/{machine_id}/nearest",
+        params={key: value for key, value in params.items() if value is not None},
+    )
+    return response.json()
+
+
+def set_cut(stem_map_id, uids, cut):
+    response = requests.patch(
+        f"{BASE_URL}/stem-maps/{stem_map_id}/cut",
+        json={"uids": uids, "cut": cut},
+    )
+    return response.json()
+
+
+def get_stem_map_stats(stem_map_id, tiles=False):
+    response = requests.get(
+        f"{BASE_URL}/stem-maps/{stem_map_id}/stats", params={"tiles": tiles}
+    )
+    return response.json()
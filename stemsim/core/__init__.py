@@ -1,3 +1,5 @@
-from .devices import Camera, GNSS
+from .devices import Camera, GNSS, Sensor, SensorNoise
 from .stem_map import StemMap, generate_stem_map
 from .machine import Machine
+from .fleet import Fleet
+from .spatial_index import SpatialIndex
@@ -1,3 +1,4 @@
+from __future__ import annotations
 from dataclasses import dataclass
 
 
@@ -36,3 +37,63 @@ class GNSS:
 
     x: float
     y: float
+
+
+@dataclass
+class SensorNoise:
+    """
+    The noise model of the GNSS and camera devices.
+
+    Detection probability falls off linearly with range, from
+    `detection_near` at the machine to `detection_far` at the camera's
+    maximum distance.
+
+    Parameters
+    ----------
+    gnss_sigma : float
+        Standard deviation of the GNSS position error in meters.
+    detection_near : float
+        Probability of detecting a stem at zero range.
+    detection_far : float
+        Probability of detecting a stem at the camera's maximum distance.
+    dbh_sigma : float
+        Standard deviation of the dbh measurement error in centimeters.
+    seed : int, optional
+        Seed of the machine's random number stream.
+    """
+
+    gnss_sigma: float = 0.0
+    detection_near: float = 1.0
+    detection_far: float = 1.0
+    dbh_sigma: float = 0.0
+    seed: int | None = None
+
+
+@dataclass
+class Sensor:
+    """
+    A sensor mounted on the machine, such as a camera or a lidar ring.
+
+    Parameters
+    ----------
+    max_dist : float
+        The maximum distance the sensor can see in meters.
+    fov : float
+        The field of view of the sensor in radians. A lidar ring has a field
+        of view of 2 * pi.
+    x : float
+        Forward offset of the sensor from the machine in meters.
+    y : float
+        Leftward offset of the sensor from the machine in meters.
+    theta : float
+        Angle of the sensor relative to the machine heading in radians.
+    name : str
+        A name to identify the sensor by.
+    """
+
+    max_dist: float
+    fov: float
+    x: float = 0.0
+    y: float = 0.0
+    theta: float = 0.0
+    name: str = ""
@@ -0,0 +1,329 @@
+from __future__ import annotations
+import os
+import threading
+import time
+import numpy as np
+from .stem_map import StemMap, generate_stem_map
+from .devices import Camera, GNSS, Sensor
+from .fleet import Fleet
+from .machine import Machine
+
+# Event kinds and the meaning of their arguments
+CREATE_STEM_MAP = 1  # width, height, tph, dbh_mu, dbh_sigma, seed
+CREATE_MACHINE = 2  # camera_max_dist, camera_fov (ref is the stem map id)
+SET_POSE = 3  # x, y, theta
+MOVE = 4  # distance, rotation
+SET_CUT = 5  # uid, cut
+CLEAR_SENSORS = 6  # no arguments
+ADD_SENSOR = 7  # max_dist, fov, x, y, theta (ref is the name, up to 16 bytes)
+
+# Every event is stored as one fixed-size record
+RECORD_DTYPE = np.dtype(
+    [
+        ("time", "<f8"),
+        ("kind", "u1"),
+        ("target", "u1", (16,)),
+        ("ref", "u1", (16,)),
+        ("args", "<f8", (6,)),
+    ]
+)
+
+MAGIC = b"STEMLOG1"
+
+
+class EventLog:
+    """
+    A compact append-only binary log of machine commands and stem map
+    mutations.
+
+    Appending only copies the event into an in-memory buffer. A background
+    writer thread writes the buffered records and syncs the file to disk
+    every `sync_interval` seconds, or as soon as a buffer fills up, so the
+    caller never blocks on disk I/O and at most `sync_interval` seconds of
+    events can be lost in a crash, even when traffic stops.
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file. Records are appended if the file exists.
+    buffer_size : int, optional
+        The number of records to buffer before waking the writer.
+    sync_interval : float, optional
+        The maximum number of seconds between syncs to disk.
+
+    Methods
+    -------
+    append(kind, target, ref, args)
+        Append an event to the log.
+    flush()
+        Write buffered records and sync the file to disk.
+    close()
+        Stop the writer, flush and close the log.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 4096, sync_interval: float = 1.0):
+        """Constructor"""
+        self.path = path
+        self.sync_interval = sync_interval
+        self._buffer_size = buffer_size
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._n = 0
+        self._full = []
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+        # The buffer lock guards the buffers, the write lock keeps writes in
+        # order when flush() is also called from outside the writer thread
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    def append(self, kind: int, target: str, ref: str = None, args: tuple = ()) -> None:
+        """
+        Append an event to the log.
+
+        Parameters
+        ----------
+        kind : int
+            The kind of event, e.g. `MOVE`.
+        target : str
+            The hex id of the machine or stem map the event applies to.
+        ref : str, optional
+            The hex id of a referenced object, e.g. a machine's stem map.
+        args : tuple, optional
+            Up to six numeric arguments of the event.
+        """
+        with self._buffer_lock:
+            record = self._buffer[self._n]
+            record["time"] = time.time()
+            record["kind"] = kind
+            record["target"] = np.frombuffer(bytes.fromhex(target), dtype=np.uint8)
+            record["ref"] = 0
+            if ref is not None:
+                record["ref"] = np.frombuffer(bytes.fromhex(ref), dtype=np.uint8)
+            record["args"] = 0
+            record["args"][: len(args)] = args
+            self._n += 1
+
+            # Hand a full buffer to the writer and start a new one
+            if self._n == self._buffer_size:
+                self._full.append(self._buffer)
+                self._buffer = np.zeros(self._buffer_size, dtype=RECORD_DTYPE)
+                self._n = 0
+                self._wake.set()
+
+    def _take(self) -> list[np.ndarray]:
+        """Take every buffered record, oldest first."""
+        with self._buffer_lock:
+            chunks, self._full = self._full, []
+            if self._n > 0:
+                chunks.append(self._buffer[: self._n])
+                self._buffer = np.zeros(self._buffer_size, dtype=RECORD_DTYPE)
+                self._n = 0
+        return chunks
+
+    def _run(self) -> None:
+        """Writer thread: flush on every wake-up or sync interval."""
+        while not self._stop.is_set():
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records and sync the file to disk."""
+        with self._write_lock:
+            chunks = self._take()
+            if not chunks:
+                return
+            for chunk in chunks:
+                self._file.write(chunk.tobytes())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Stop the writer, flush and close the log."""
+        if not self._file.closed:
+            self._stop.set()
+            self._wake.set()
+            self._writer.join()
+            self.flush()
+            self._file.close()
+
+    def __repr__(self):
+        return f"<EventLog {self.path}>"
+
+
+def read_event_log(path: str, chunk_size: int = 1 << 20):
+    """
+    Read an event log in chunks of records.
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file.
+    chunk_size : int, optional
+        The maximum number of records in each chunk.
+
+    Yields
+    ------
+    np.ndarray
+        A structured array of records with dtype `RECORD_DTYPE`.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a StemSim event log")
+        while True:
+            chunk = np.fromfile(f, dtype=RECORD_DTYPE, count=chunk_size)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+
+def replay(
+    path: str, until: float = None, chunk_size: int = 1 << 20
+) -> tuple[dict[str, StemMap], dict[str, Machine], Fleet]:
+    """
+    Rebuild the stem maps and machines recorded in an event log.
+
+    Creation and sensor events are applied one by one, but poses and cut
+    flags are rebuilt for a whole chunk of records at once: moves between pose
+    resets are composed with segmented cumulative sums over each machine's
+    events. Sensor noise models are not recorded, so replayed machines have
+    ideal devices, and sensor names are truncated to 16 bytes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file.
+    until : float, optional
+        Only apply events recorded at or before this Unix timestamp. If not
+        given, every event is applied.
+    chunk_size : int, optional
+        The maximum number of records to apply at once.
+
+    Returns
+    -------
+    tuple[dict[str, StemMap], dict[str, Machine], Fleet]
+        The stem maps and machines keyed by id, and the fleet holding the
+        machine state.
+    """
+    stem_maps = {}
+    machines = {}
+    fleet = Fleet()
+
+    for chunk in read_event_log(path, chunk_size):
+        if until is not None:
+            chunk = chunk[chunk["time"] <= until]
+        kind = chunk["kind"]
+
+        # Objects are created before any other event of the chunk is applied.
+        # This is safe since no event can reference an object before it exists.
+        for record in chunk[kind == CREATE_STEM_MAP]:
+            width, height, tph, dbh_mu, dbh_sigma, seed = record["args"]
+            stem_maps[record["target"].tobytes().hex()] = generate_stem_map(
+                int(width), int(height), tph, dbh_mu, dbh_sigma, int(seed)
+            )
+        for record in chunk[kind == CREATE_MACHINE]:
+            max_dist, fov = record["args"][:2]
+            machines[record["target"].tobytes().hex()] = fleet.add(
+                stem_maps[record["ref"].tobytes().hex()],
+                Camera(0, max_dist, fov),
+                GNSS(0, 0),
+            )
+
+        for record in chunk[(kind == CLEAR_SENSORS) | (kind == ADD_SENSOR)]:
+            machine = machines[record["target"].tobytes().hex()]
+            if record["kind"] == CLEAR_SENSORS:
+                machine.sensors = []
+            else:
+                max_dist, fov, x, y, theta = record["args"][:5].tolist()
+                name = decode_name(record["ref"].tobytes().hex())
+                machine.sensors.append(Sensor(max_dist, fov, x, y, theta, name))
+
+        _replay_cuts(chunk[kind == SET_CUT], stem_maps)
+        _replay_poses(chunk[(kind == SET_POSE) | (kind == MOVE)], machines, fleet)
+
+    return stem_maps, machines, fleet
+
+
+def encode_name(name: str) -> str:
+    """Encode a name as a 16-byte hex id, truncating it if needed."""
+    return name.encode()[:16].ljust(16, b"\0").hex()
+
+
+def decode_name(name: str) -> str:
+    """Decode a name encoded by `encode_name`."""
+    return bytes.fromhex(name).rstrip(b"\0").decode(errors="ignore")
+
+
+def _replay_cuts(records: np.ndarray, stem_maps: dict[str, StemMap]) -> None:
+    """Apply a chunk of cut events, keeping the last event of each stem."""
+    target = _ids(records["target"])
+    for stem_map_id in np.unique(target):
+        args = records["args"][target == stem_map_id]
+
+        # Reverse so that np.unique picks the last event of each uid
+        uid, last = np.unique(args[::-1, 0], return_index=True)
+        stem_maps[stem_map_id.tobytes().hex()].set_cut(
+            uid.astype(int), args[::-1, 1][last]
+        )
+
+
+def _replay_poses(
+    records: np.ndarray, machines: dict[str, Machine], fleet: Fleet
+) -> None:
+    """Apply a chunk of pose and move events to the fleet."""
+    if len(records) == 0:
+        return
+
+    # Group the events by machine, keeping their order within each machine
+    target, inverse = np.unique(_ids(records["target"]), return_inverse=True)
+    slot = np.array([fleet.slot(machines[t.tobytes().hex()]) for t in target])
+    slot = slot[inverse.ravel()]
+    order = np.argsort(slot, kind="stable")
+    slot, records = slot[order], records[order]
+    reset = records["kind"] == SET_POSE
+    args = records["args"]
+
+    # Split each machine's events into segments that start at a pose reset or
+    # at the machine's first event in the chunk
+    first = np.r_[True, slot[1:] != slot[:-1]]
+    segment = np.cumsum(first | reset) - 1
+    start = np.flatnonzero(first | reset)
+    start_reset = reset[start]
+
+    # A segment starts from the reset pose or from the current fleet state
+    base_x = np.where(start_reset, args[start, 0], fleet.x[slot[start]])
+    base_y = np.where(start_reset, args[start, 1], fleet.y[slot[start]])
+    base_theta = np.where(start_reset, args[start, 2], fleet.theta[slot[start]])
+
+    # Compose the moves of each segment: turn first, then drive
+    rotation = np.where(reset, 0.0, args[:, 1])
+    distance = np.where(reset, 0.0, args[:, 0])
+    theta = base_theta[segment] + _segmented_cumsum(rotation, start, segment)
+    theta = np.where(reset, theta, theta % (2 * np.pi))
+    x = base_x[segment] + _segmented_cumsum(distance * np.cos(theta), start, segment)
+    y = base_y[segment] + _segmented_cumsum(distance * np.sin(theta), start, segment)
+
+    # The last event of each machine holds its final pose
+    last = np.r_[slot[1:] != slot[:-1], True]
+    fleet.x[slot[last]] = x[last]
+    fleet.y[slot[last]] = y[last]
+    fleet.theta[slot[last]] = theta[last]
+
+
+def _ids(ids: np.ndarray) -> np.ndarray:
+    """View an (n, 16) array of id bytes as n opaque 16-byte values."""
+    return np.ascontiguousarray(ids).view("V16").ravel()
+
+
+def _segmented_cumsum(
+    values: np.ndarray, start: np.ndarray, segment: np.ndarray
+) -> np.ndarray:
+    """Cumulative sum of values that restarts at each segment start."""
+    total = np.cumsum(values)
+    return total - (total[start] - values[start])[segment]
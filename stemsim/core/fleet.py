@@ -0,0 +1,283 @@
+from __future__ import annotations
+import numpy as np
+from .stem_map import StemMap
+from .devices import Camera, GNSS, Sensor, SensorNoise
+from .machine import Machine
+
+
+class Fleet:
+    """
+    A fleet of machines stored as a struct of arrays.
+
+    The poses and camera parameters of every machine live in contiguous
+    arrays so that a batch of moves can be applied to the whole fleet in a
+    single vectorized step. Each machine is exposed as a regular `Machine`
+    whose camera and GNSS devices are lightweight views into the arrays.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        The initial number of machine slots to allocate.
+
+    Attributes
+    ----------
+    x : np.ndarray
+        X position of each machine in meters.
+    y : np.ndarray
+        Y position of each machine in meters.
+    theta : np.ndarray
+        Heading of each machine in radians.
+    max_dist : np.ndarray
+        Maximum camera distance of each machine in meters.
+    fov : np.ndarray
+        Camera field of view of each machine in radians.
+
+    Methods
+    -------
+    add(stem_map, camera, gnss, noise, sensors)
+        Add a machine to the fleet.
+    slot(machine)
+        Return the fleet slot of a machine.
+    move(distance, rotation, index)
+        Move a batch of machines.
+    """
+
+    def __init__(self, capacity: int = 64):
+        """Constructor"""
+        self._n = 0
+        self._state = np.zeros((5, max(capacity, 1)))
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def x(self) -> np.ndarray:
+        """
+        X position of each machine in meters.
+
+        Returns
+        -------
+        np.ndarray
+            The x position of each machine in meters.
+        """
+        return self._state[0, : self._n]
+
+    @property
+    def y(self) -> np.ndarray:
+        """
+        Y position of each machine in meters.
+
+        Returns
+        -------
+        np.ndarray
+            The y position of each machine in meters.
+        """
+        return self._state[1, : self._n]
+
+    @property
+    def theta(self) -> np.ndarray:
+        """
+        Heading of each machine in radians.
+
+        Returns
+        -------
+        np.ndarray
+            The heading of each machine in radians.
+        """
+        return self._state[2, : self._n]
+
+    @property
+    def max_dist(self) -> np.ndarray:
+        """
+        Maximum camera distance of each machine in meters.
+
+        Returns
+        -------
+        np.ndarray
+            The maximum camera distance of each machine in meters.
+        """
+        return self._state[3, : self._n]
+
+    @property
+    def fov(self) -> np.ndarray:
+        """
+        Camera field of view of each machine in radians.
+
+        Returns
+        -------
+        np.ndarray
+            The camera field of view of each machine in radians.
+        """
+        return self._state[4, : self._n]
+
+    def add(
+        self,
+        stem_map: StemMap,
+        camera: Camera,
+        gnss: GNSS,
+        noise: SensorNoise = None,
+        sensors: list[Sensor] = None,
+    ) -> Machine:
+        """
+        Add a machine to the fleet.
+
+        Parameters
+        ----------
+        stem_map : StemMap
+            The stem map to place the machine in.
+        camera : Camera
+            The initial camera parameters.
+        gnss : GNSS
+            The initial GNSS position.
+        noise : SensorNoise, optional
+            The noise model of the machine's devices.
+        sensors : list[Sensor], optional
+            Additional sensors mounted on the machine.
+
+        Returns
+        -------
+        Machine
+            A machine whose devices are views into the fleet arrays.
+        """
+
+        # Double the capacity of the state arrays when they are full
+        if self._n == self._state.shape[1]:
+            state = np.zeros((5, 2 * self._state.shape[1]))
+            state[:, : self._n] = self._state[:, : self._n]
+            self._state = state
+
+        slot = self._n
+        self._state[:, slot] = (
+            gnss.x,
+            gnss.y,
+            camera.theta,
+            camera.max_dist,
+            camera.fov,
+        )
+        self._n += 1
+
+        return Machine(
+            stem_map,
+            _CameraView(self, slot),
+            _GNSSView(self, slot),
+            noise,
+            sensors,
+        )
+
+    def slot(self, machine: Machine) -> int:
+        """
+        Return the fleet slot of a machine.
+
+        Parameters
+        ----------
+        machine : Machine
+            A machine created by `Fleet.add`.
+
+        Returns
+        -------
+        int
+            The index of the machine in the fleet arrays.
+        """
+        if not isinstance(machine.gnss, _GNSSView) or machine.gnss._fleet is not self:
+            raise ValueError("Machine does not belong to this fleet")
+        return machine.gnss._slot
+
+    def move(
+        self,
+        distance: np.ndarray | float,
+        rotation: np.ndarray | float,
+        index: np.ndarray = None,
+    ) -> None:
+        """
+        Move a batch of machines in one vectorized step.
+
+        Parameters
+        ----------
+        distance : np.ndarray | float
+            Distance to move each machine in meters.
+        rotation : np.ndarray | float
+            Rotation to turn each machine in radians.
+        index : np.ndarray, optional
+            The fleet slots of the machines to move. If not given, every
+            machine in the fleet is moved.
+        """
+        if index is None:
+            index = np.arange(self._n)
+        index = np.asarray(index, dtype=int)
+
+        # Slots past the last machine are unused capacity
+        if np.any((index < 0) | (index >= self._n)):
+            raise IndexError("Fleet slot out of range")
+
+        # A machine moved twice in one batch would only see its last move
+        if len(np.unique(index)) != len(index):
+            raise ValueError("Each machine can only be moved once per batch")
+
+        # Same update as Machine.move, applied to every selected slot at once
+        theta = (self._state[2, index] + rotation) % (2 * np.pi)
+        self._state[2, index] = theta
+        self._state[0, index] += distance * np.cos(theta)
+        self._state[1, index] += distance * np.sin(theta)
+
+    def __repr__(self):
+        return f"<Fleet {self._n} machines>"
+
+
+class _CameraView:
+    """Camera device backed by a slot in the fleet arrays."""
+
+    __slots__ = ("_fleet", "_slot")
+
+    def __init__(self, fleet: Fleet, slot: int):
+        self._fleet = fleet
+        self._slot = slot
+
+    @property
+    def theta(self) -> float:
+        return float(self._fleet._state[2, self._slot])
+
+    @theta.setter
+    def theta(self, value: float) -> None:
+        self._fleet._state[2, self._slot] = value
+
+    @property
+    def max_dist(self) -> float:
+        return float(self._fleet._state[3, self._slot])
+
+    @max_dist.setter
+    def max_dist(self, value: float) -> None:
+        self._fleet._state[3, self._slot] = value
+
+    @property
+    def fov(self) -> float:
+        return float(self._fleet._state[4, self._slot])
+
+    @fov.setter
+    def fov(self, value: float) -> None:
+        self._fleet._state[4, self._slot] = value
+
+
+class _GNSSView:
+    """GNSS device backed by a slot in the fleet arrays."""
+
+    __slots__ = ("_fleet", "_slot")
+
+    def __init__(self, fleet: Fleet, slot: int):
+        self._fleet = fleet
+        self._slot = slot
+
+    @property
+    def x(self) -> float:
+        return float(self._fleet._state[0, self._slot])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._fleet._state[0, self._slot] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._fleet._state[1, self._slot])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._fleet._state[1, self._slot] = value
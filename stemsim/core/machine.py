@@ -1,6 +1,6 @@
 import numpy as np
 from .stem_map import StemMap
-from .devices import Camera, GNSS
+from .devices import Camera, GNSS, Sensor, SensorNoise
 from .utils import create_2d_transformation_matrix
 
 
@@ -16,6 +16,10 @@ class Machine:
         The camera device.
     gnss : GNSS
         The GNSS device.
+    noise : SensorNoise, optional
+        The noise model of the devices. If not given, the devices are ideal.
+    sensors : list[Sensor], optional
+        Additional sensors mounted on the machine.
 
     Attributes
     ----------
@@ -25,6 +29,12 @@ class Machine:
         The camera device.
     gnss : GNSS
         The GNSS device.
+    noise : SensorNoise | None
+        The noise model of the devices.
+    rng : np.random.Generator
+        The machine's random number stream, seeded from the noise model.
+    sensors : list[Sensor]
+        Additional sensors mounted on the machine.
     pose : tuple[float, float, float]
         The current pose of the machine.
 
@@ -34,13 +44,31 @@ class Machine:
         Move the machine.
     get_stems(stem_map)
         Get the stems from the camera.
+    sample_local_stems(n_trials)
+        Get several noisy realizations of the stems from the camera.
+    get_sensor_stems()
+        Get the stems seen by each mounted sensor.
+    check_clearance(distance, rotation, radius)
+        Find the first stem a move would drive into.
+    get_nearest_stems(k, cut, dbh_min, dbh_max)
+        Get the k nearest stems to the machine.
     """
 
-    def __init__(self, stem_map: StemMap, camera: Camera, gnss: GNSS):
+    def __init__(
+        self,
+        stem_map: StemMap,
+        camera: Camera,
+        gnss: GNSS,
+        noise: SensorNoise = None,
+        sensors: list[Sensor] = None,
+    ):
         """Constructor"""
         self.stem_map = stem_map
         self.camera = camera
         self.gnss = gnss
+        self.noise = noise
+        self.rng = np.random.default_rng(None if noise is None else noise.seed)
+        self.sensors = list(sensors) if sensors is not None else []
 
     @property
     def pose(self) -> tuple[float, float, float]:
@@ -87,15 +115,184 @@ class Machine:
         self.gnss.x += distance * np.cos(self.camera.theta)
         self.gnss.y += distance * np.sin(self.camera.theta)
 
+    def check_clearance(
+        self,
+        distance: np.ndarray | float,
+        rotation: np.ndarray | float,
+        radius: float,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the first stem a move would drive into.
+
+        Each candidate move is interpreted the same way as `move`: the machine
+        turns by `rotation` and then drives `distance` meters. The machine's
+        footprint is swept along the resulting path without moving it.
+
+        Parameters
+        ----------
+        distance : np.ndarray | float
+            Distance of each candidate move in meters.
+        rotation : np.ndarray | float
+            Rotation of each candidate move in radians.
+        radius : float
+            Radius of the machine footprint in meters.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The uid of the first stem hit by each move (-1 if the move is
+            clear) and the distance driven before the hit (inf if the move is
+            clear).
+        """
+        theta = (self.camera.theta + np.asarray(rotation)) % (2 * np.pi)
+        return self.stem_map.sweep(self.gnss.x, self.gnss.y, theta, distance, radius)
+
+    def get_nearest_stems(
+        self,
+        k: int = 1,
+        cut: bool = None,
+        dbh_min: float = None,
+        dbh_max: float = None,
+    ) -> tuple[StemMap, np.ndarray]:
+        """
+        Get the k nearest stems to the machine.
+
+        Parameters
+        ----------
+        k : int, optional
+            The number of stems to get.
+        cut : bool, optional
+            Only consider stems whose cut flag matches this value.
+        dbh_min : float, optional
+            Only consider stems with at least this dbh in centimeters.
+        dbh_max : float, optional
+            Only consider stems with at most this dbh in centimeters.
+
+        Returns
+        -------
+        tuple[StemMap, np.ndarray]
+            The nearest stems sorted by distance and their distances from the
+            machine in meters. Fewer than k stems are returned if fewer match.
+        """
+        rows, distance = self.stem_map.nearest(
+            self.gnss.x, self.gnss.y, k, cut, dbh_min, dbh_max
+        )
+        found = rows[0] >= 0
+        return StemMap(self.stem_map._stems[rows[0][found]]), distance[0][found]
+
     def get_local_stems(self) -> StemMap:
         """
         Get the stems from the camera.
 
+        If the machine has a noise model, the stems are one noisy realization
+        of the measurement.
+
         Returns
         -------
         StemMap
             The stems in the camera's field of view.
         """
+        if self.noise is not None:
+            return self.sample_local_stems(1)[0][0]
+        return self._get_visible_stems()
+
+    def sample_local_stems(self, n_trials: int) -> tuple[list[StemMap], np.ndarray]:
+        """
+        Get several noisy realizations of the stems from the camera.
+
+        The visible stems are found once from the true pose. The noise of all
+        trials is then drawn from the machine's random number stream in one
+        vectorized step: a GNSS position error shifts the reported positions,
+        stems are detected with a probability that falls off with range, and
+        measured dbh values get a Gaussian error.
+
+        Parameters
+        ----------
+        n_trials : int
+            The number of noise realizations.
+
+        Returns
+        -------
+        tuple[list[StemMap], np.ndarray]
+            The stems detected in each trial and the measured GNSS position of
+            each trial, shape (n_trials, 2).
+        """
+        noise = self.noise if self.noise is not None else SensorNoise()
+        visible = self._get_visible_stems()
+        n = len(visible._stems)
+
+        # Draw the noise of every trial at once
+        gnss_error = self.rng.normal(0, noise.gnss_sigma, (n_trials, 2))
+        # Relative range of each stem, guarding against a camera that sees nothing
+        rho = np.hypot(visible.x - self.gnss.x, visible.y - self.gnss.y)
+        rel_range = rho / self.camera.max_dist if self.camera.max_dist > 0 else rho
+        p = (
+            noise.detection_near
+            + (noise.detection_far - noise.detection_near) * rel_range
+        )
+        detected = self.rng.random((n_trials, n)) < np.clip(p, 0, 1)
+        dbh_error = self.rng.normal(0, noise.dbh_sigma, (n_trials, n))
+
+        # The heading is exact, so a GNSS error shifts every reported stem
+        stems = np.repeat(visible._stems[np.newaxis], n_trials, axis=0)
+        stems[:, :, 1] += gnss_error[:, 0:1]
+        stems[:, :, 2] += gnss_error[:, 1:2]
+        stems[:, :, 3] += dbh_error
+
+        gnss = np.array([self.gnss.x, self.gnss.y]) + gnss_error
+        return [StemMap(stems[k][detected[k]]) for k in range(n_trials)], gnss
+
+    def get_sensor_stems(self) -> list[StemMap]:
+        """
+        Get the stems seen by each mounted sensor.
+
+        Candidate stems are gathered once from the spatial index around the
+        machine, and every sensor is evaluated against them in one fused
+        pass, so no sensor transforms or scans the whole stem map.
+
+        Returns
+        -------
+        list[StemMap]
+            The stems in each sensor's field of view, in the order of
+            `sensors`, in the world frame of reference.
+        """
+        if not self.sensors:
+            return []
+
+        # Compute the world pose of every sensor from its mounting offset
+        mount = np.array([[s.x, s.y, s.theta, s.max_dist, s.fov] for s in self.sensors])
+        cos_theta, sin_theta = np.cos(self.camera.theta), np.sin(self.camera.theta)
+        sx = self.gnss.x + cos_theta * mount[:, 0] - sin_theta * mount[:, 1]
+        sy = self.gnss.y + sin_theta * mount[:, 0] + cos_theta * mount[:, 1]
+        stheta = self.camera.theta + mount[:, 2]
+        max_dist, fov = mount[:, 3], mount[:, 4]
+
+        # Gather the candidate stems within reach of any sensor
+        _, rows = self.stem_map.index.query_boxes(
+            (sx - max_dist).min(),
+            (sy - max_dist).min(),
+            (sx + max_dist).max(),
+            (sy + max_dist).max(),
+        )
+        x, y = self.stem_map.x[rows], self.stem_map.y[rows]
+
+        # Polar coordinates of every candidate in every sensor's frame
+        dx, dy = x - sx[:, np.newaxis], y - sy[:, np.newaxis]
+        rho = np.hypot(dx, dy)
+        theta = np.arctan2(dy, dx) - stheta[:, np.newaxis]
+        theta = (theta + np.pi) % (2 * np.pi) - np.pi
+
+        visible = (rho < max_dist[:, np.newaxis]) & (
+            (np.abs(theta) < fov[:, np.newaxis] / 2) | (fov[:, np.newaxis] >= 2 * np.pi)
+        )
+
+        # Keep the stems in map order, like the camera query does
+        order = np.argsort(rows, kind="stable")
+        rows, visible = rows[order], visible[:, order]
+        return [StemMap(self.stem_map._stems[rows[mask]]) for mask in visible]
+
+    def _get_visible_stems(self) -> StemMap:
+        """Get the stems in the camera's field of view from the true pose."""
 
         # Compute the transformation matrix from the world frame of reference
         T = create_2d_transformation_matrix(self.gnss.x, self.gnss.y, self.camera.theta)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import numpy as np
+
+
+class SpatialIndex:
+    """
+    A uniform grid index over a set of 2D points.
+
+    Points are bucketed into square cells and stored sorted by cell so that
+    the points of any cell form a contiguous run. Box queries are answered
+    for many boxes at once without Python loops.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        X position of each point in meters.
+    y : np.ndarray
+        Y position of each point in meters.
+    cell_size : float, optional
+        The width of a grid cell in meters. If not given, the cell size is
+        chosen so that each cell holds a handful of points on average.
+
+    Attributes
+    ----------
+    cell_size : float
+        The width of a grid cell in meters.
+
+    Methods
+    -------
+    query_boxes(xmin, ymin, xmax, ymax)
+        Find the candidate points that fall in the cells covered by each box.
+    nearest(x, y, k, mask)
+        Find the k nearest points to each query position.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell_size: float = None):
+        """Constructor"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self._n = len(x)
+
+        if self._n == 0:
+            self._x0, self._y0, self._x1, self._y1 = 0.0, 0.0, 0.0, 0.0
+        else:
+            self._x0, self._y0 = x.min(), y.min()
+            self._x1, self._y1 = x.max(), y.max()
+        self._x, self._y = x, y
+
+        # Aim for roughly four points per cell
+        if cell_size is None:
+            if self._n == 0:
+                area = 1.0
+            else:
+                area = max((self._x1 - self._x0) * (self._y1 - self._y0), 1.0)
+            cell_size = 2 * np.sqrt(area / max(self._n, 1))
+        self.cell_size = float(cell_size)
+
+        # Compute the grid dimensions and the cell of every point
+        if self._n == 0:
+            self._nx, self._ny = 1, 1
+        else:
+            self._nx = int((self._x1 - self._x0) // self.cell_size) + 1
+            self._ny = int((self._y1 - self._y0) // self.cell_size) + 1
+        cell = self._cell(x, y)
+
+        # Sort the points by cell and record where each cell's run starts
+        self._order = np.argsort(cell, kind="stable")
+        counts = np.bincount(cell, minlength=self._nx * self._ny)
+        self._offsets = np.zeros(self._nx * self._ny + 1, dtype=int)
+        np.cumsum(counts, out=self._offsets[1:])
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _cell_coords(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Grid column and row of each position, clipped to the grid."""
+        # Clip before casting so that far away or infinite boxes stay in range
+        ix = np.clip(
+            np.floor((np.asarray(x) - self._x0) / self.cell_size), 0, self._nx - 1
+        )
+        iy = np.clip(
+            np.floor((np.asarray(y) - self._y0) / self.cell_size), 0, self._ny - 1
+        )
+        return ix.astype(int), iy.astype(int)
+
+    def _cell(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Flat cell id of each position."""
+        ix, iy = self._cell_coords(x, y)
+        return iy * self._nx + ix
+
+    def query_boxes(
+        self,
+        xmin: np.ndarray,
+        ymin: np.ndarray,
+        xmax: np.ndarray,
+        ymax: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the candidate points that fall in the cells covered by each box.
+
+        Every point inside a box is returned, but points in the boundary
+        cells that lie outside the box may also be returned. Callers are
+        expected to apply an exact test to the candidates.
+
+        Parameters
+        ----------
+        xmin : np.ndarray
+            Minimum x of each box in meters.
+        ymin : np.ndarray
+            Minimum y of each box in meters.
+        xmax : np.ndarray
+            Maximum x of each box in meters.
+        ymax : np.ndarray
+            Maximum y of each box in meters.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The box index and point index of each candidate pair.
+        """
+        xmin, ymin, xmax, ymax = np.broadcast_arrays(
+            *(
+                np.atleast_1d(np.asarray(v, dtype=float))
+                for v in (xmin, ymin, xmax, ymax)
+            )
+        )
+        if self._n == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        # Boxes with a NaN bound cover no cells. Their bounds are zeroed so
+        # that the integer cast below stays well defined.
+        empty = np.isnan(xmin) | np.isnan(ymin) | np.isnan(xmax) | np.isnan(ymax)
+        xmin, ymin, xmax, ymax = (
+            np.where(empty, 0.0, v) for v in (xmin, ymin, xmax, ymax)
+        )
+
+        # Compute the range of cells covered by each box
+        ix0, iy0 = self._cell_coords(xmin, ymin)
+        ix1, iy1 = self._cell_coords(xmax, ymax)
+        width = ix1 - ix0 + 1
+        n_cells = np.where(empty, 0, width * (iy1 - iy0 + 1))
+
+        # Enumerate every (box, cell) pair
+        box = np.repeat(np.arange(len(n_cells)), n_cells)
+        local = np.arange(len(box)) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        cell = (
+            (iy0[box] + local // width[box]) * self._nx + ix0[box] + local % width[box]
+        )
+
+        # Expand each (box, cell) pair into the points stored in that cell
+        start = self._offsets[cell]
+        count = self._offsets[cell + 1] - start
+        pair_box = np.repeat(box, count)
+        pos = (
+            np.arange(len(pair_box))
+            - np.repeat(np.cumsum(count) - count, count)
+            + np.repeat(start, count)
+        )
+
+        return pair_box, self._order[pos]
+
+    def nearest(
+        self,
+        x: np.ndarray | float,
+        y: np.ndarray | float,
+        k: int = 1,
+        mask: np.ndarray = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest points to each query position.
+
+        The search radius of each query starts small and doubles until k
+        points are found inside it, so only the cells near each query are
+        visited. All queries are evaluated in one batch.
+
+        Parameters
+        ----------
+        x : np.ndarray | float
+            X position of each query in meters.
+        y : np.ndarray | float
+            Y position of each query in meters.
+        k : int, optional
+            The number of neighbors to find.
+        mask : np.ndarray, optional
+            Boolean array selecting the points that may be returned. If not
+            given, every point may be returned.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Arrays of shape (n_queries, min(k, n_eligible)) holding the index
+            of each neighbor sorted by distance (-1 if the query position is
+            not finite) and its distance in meters (inf in the same case).
+        """
+        x, y = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(x, dtype=float)),
+            np.atleast_1d(np.asarray(y, dtype=float)),
+        )
+        if mask is None:
+            mask = np.ones(self._n, dtype=bool)
+        n_eligible = np.count_nonzero(mask)
+
+        # There can never be more neighbors than eligible points
+        k = max(min(k, n_eligible), 0)
+        index = np.full((len(x), k), -1, dtype=int)
+        distance = np.full((len(x), k), np.inf)
+        if k == 0:
+            return index, distance
+
+        # Start with a radius expected to hold k eligible points
+        density = n_eligible / max((self._x1 - self._x0) * (self._y1 - self._y0), 1.0)
+        radius = np.full(len(x), max(np.sqrt(k / (np.pi * density)), self.cell_size))
+        # Queries at non-finite positions have no neighbors and are never
+        # searched, since their search box could never contain a point
+        pending = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+
+        while len(pending) > 0:
+            px, py, r = x[pending], y[pending], radius[pending]
+            query, point = self.query_boxes(px - r, py - r, px + r, py + r)
+            keep = mask[point]
+            query, point = query[keep], point[keep]
+            d = np.hypot(self._x[point] - px[query], self._y[point] - py[query])
+
+            # A query is done once k points lie within its radius, or once its
+            # box covers every point so there is nothing left to find
+            covers = (
+                (px - r <= self._x0)
+                & (py - r <= self._y0)
+                & (px + r >= self._x1)
+                & (py + r >= self._y1)
+            )
+            inside = d <= r[query]
+            done = covers | (np.bincount(query[inside], minlength=len(pending)) >= k)
+
+            # Rank the candidates of each finished query by distance
+            keep = done[query] & (inside | covers[query])
+            query, point, d = query[keep], point[keep], d[keep]
+            order = np.lexsort((d, query))
+            query, point, d = query[order], point[order], d[order]
+            rank = np.arange(len(query)) - np.searchsorted(query, query)
+            keep = rank < k
+            row = pending[query[keep]]
+            index[row, rank[keep]] = point[keep]
+            distance[row, rank[keep]] = d[keep]
+
+            # Grow the search radius of the unfinished queries
+            radius[pending[~done]] *= 2
+            pending = pending[~done]
+
+        return index, distance
+
+    def __repr__(self):
+        return f"<SpatialIndex {self._n} points, {self._nx}x{self._ny} cells>"
@@ -1,5 +1,7 @@
 from __future__ import annotations
 import numpy as np
+from .spatial_index import SpatialIndex
+from .stem_stats import StemStats
 
 
 class StemMap:
@@ -15,6 +17,9 @@ class StemMap:
         - y: y position in meters
         - dbh: diameter at breast height in centimeters
         - cut: boolean indicating whether the stem is marked to cut
+    bounds : tuple[float, float, float, float], optional
+        The (xmin, ymin, xmax, ymax) extent of the stand in meters. If not
+        given, the bounding box of the stems is used.
 
     Attributes
     ----------
@@ -28,6 +33,12 @@ class StemMap:
         Diameter at breast height of each stem in centimeters.
     cut : np.ndarray
         Boolean indicating whether each stem is marked to cut.
+    bounds : tuple[float, float, float, float]
+        The extent of the stand in meters.
+    index : SpatialIndex
+        Spatial index over the stem positions, built on first use.
+    stats : StemStats
+        Running stand statistics, built on first use.
 
     Methods
     -------
@@ -37,11 +48,25 @@ class StemMap:
         Transform the stem map by the given affine transformation matrix.
     query(radius, min_theta, max_theta)
         Query the stem map for stems within the given radius and angle range.
+    sweep(x, y, theta, length, radius)
+        Sweep a circular footprint along segments and find the first stem hit.
+    nearest(x, y, k, cut, dbh_min, dbh_max)
+        Find the k nearest stems to each query position.
+    rows(uid)
+        Find the rows of the stems with the given unique identifiers.
+    set_cut(uid, cut)
+        Mark stems to cut or leave.
+    build_stats()
+        Compute the running stand statistics from scratch.
     """
 
-    def __init__(self, stems):
+    def __init__(self, stems, bounds: tuple[float, float, float, float] = None):
         """Constructor"""
         self._stems = stems
+        self._bounds = bounds
+        self._index = None
+        self._stats = None
+        self._uid_order = None
 
     def copy(self) -> StemMap:
         """
@@ -52,7 +77,7 @@ class StemMap:
         StemMap
             A copy of the stem map.
         """
-        return StemMap(self._stems.copy())
+        return StemMap(self._stems.copy(), self._bounds)
 
     @property
     def uid(self) -> np.ndarray:
@@ -89,6 +114,8 @@ class StemMap:
             The x position of each stem in meters.
         """
         self._stems[:, 1] = array
+        self._index = None
+        self._stats = None
 
     @property
     def y(self) -> np.ndarray:
@@ -113,6 +140,8 @@ class StemMap:
             The y position of each stem in meters.
         """
         self._stems[:, 2] = array
+        self._index = None
+        self._stats = None
 
     @property
     def dbh(self) -> np.ndarray:
@@ -138,6 +167,107 @@ class StemMap:
         """
         return self._stems[:, 4]
 
+    def rows(self, uid: np.ndarray) -> np.ndarray:
+        """
+        Find the rows of the stems with the given unique identifiers.
+
+        Parameters
+        ----------
+        uid : np.ndarray
+            Unique identifiers of the stems.
+
+        Returns
+        -------
+        np.ndarray
+            The row of each stem in the stem map.
+        """
+        uid = np.atleast_1d(np.asarray(uid))
+        if self._uid_order is None:
+            self._uid_order = np.argsort(self.uid, kind="stable")
+        pos = np.searchsorted(self.uid, uid, sorter=self._uid_order)
+        rows = self._uid_order[np.minimum(pos, len(self._uid_order) - 1)]
+        if len(self._stems) == 0 or np.any(self.uid[rows] != uid):
+            raise KeyError("Unknown stem uid")
+        return rows
+
+    def set_cut(self, uid: np.ndarray, cut: np.ndarray | bool) -> None:
+        """
+        Mark stems to cut or leave.
+
+        Parameters
+        ----------
+        uid : np.ndarray
+            Unique identifiers of the stems to mark.
+        cut : np.ndarray | bool
+            Whether each stem is marked to cut.
+        """
+        rows = self.rows(uid)
+        cut = np.broadcast_to(np.asarray(cut, dtype=bool), rows.shape)
+
+        # Keep only the last change of each stem so the stats see unique rows
+        rows, last = np.unique(rows[::-1], return_index=True)
+        cut = cut[::-1][last]
+        if self._stats is not None:
+            self._stats.update(rows, cut)
+        self._stems[rows, 4] = cut
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """
+        The extent of the stand in meters.
+
+        Returns
+        -------
+        tuple[float, float, float, float]
+            The (xmin, ymin, xmax, ymax) extent of the stand.
+        """
+        if self._bounds is not None:
+            return self._bounds
+        if len(self._stems) == 0:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (self.x.min(), self.y.min(), self.x.max(), self.y.max())
+
+    @property
+    def stats(self) -> StemStats:
+        """
+        Running stand statistics, built on first use and then kept up to date
+        as stems are marked.
+
+        Returns
+        -------
+        StemStats
+            The stand statistics aggregated per tile.
+        """
+        if self._stats is None:
+            self.build_stats()
+        return self._stats
+
+    def build_stats(self) -> StemStats:
+        """
+        Compute the running stand statistics from scratch.
+
+        Returns
+        -------
+        StemStats
+            The stand statistics aggregated per tile.
+        """
+        self._stats = StemStats(self.x, self.y, self.dbh, self.cut, self.bounds)
+        return self._stats
+
+    @property
+    def index(self) -> SpatialIndex:
+        """
+        Spatial index over the stem positions, built on first use.
+
+        Returns
+        -------
+        SpatialIndex
+            The spatial index of the stem positions.
+        """
+        if self._index is None:
+            self._index = SpatialIndex(self.x, self.y)
+        return self._index
+
     def affine_transform(self, T: np.ndarray) -> StemMap:
         """
         Transform the stem map by the given affine transformation matrix.
@@ -196,6 +326,145 @@ class StemMap:
             self._stems[mask],
         )
 
+    def sweep(
+        self,
+        x: np.ndarray | float,
+        y: np.ndarray | float,
+        theta: np.ndarray | float,
+        length: np.ndarray | float,
+        radius: float,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sweep a circular footprint along segments and find the first stem hit.
+
+        Each segment starts at (x, y) and runs `length` meters along heading
+        `theta`; a negative length runs backwards, as in a reverse move.
+        Stems are treated as circles with a diameter of dbh, so a stem is hit
+        once the footprint comes within `radius` plus the stem radius of its
+        center. All segments are evaluated in one batch.
+
+        Parameters
+        ----------
+        x : np.ndarray | float
+            X position of each segment start in meters.
+        y : np.ndarray | float
+            Y position of each segment start in meters.
+        theta : np.ndarray | float
+            Heading of each segment in radians.
+        length : np.ndarray | float
+            Length of each segment in meters.
+        radius : float
+            Radius of the footprint in meters.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The uid of the first stem hit by each segment (-1 if the segment
+            is clear or not finite) and the distance travelled before the hit
+            (inf in the same cases).
+        """
+        x, y, theta, length = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(v, dtype=float)) for v in (x, y, theta, length))
+        )
+        uid = np.full(len(x), -1, dtype=int)
+        distance = np.full(len(x), np.inf)
+        if len(self._stems) == 0:
+            return uid, distance
+
+        # A reverse segment is a forward segment along the opposite heading
+        reverse = length < 0
+        theta = np.where(reverse, theta + np.pi, theta)
+        length = np.abs(length)
+
+        # Segments with a non-finite start, heading or length are left clear,
+        # since no stem can be placed along them
+        valid = np.flatnonzero(
+            np.isfinite(x) & np.isfinite(y) & np.isfinite(theta) & np.isfinite(length)
+        )
+        x, y, theta, length = x[valid], y[valid], theta[valid], length[valid]
+
+        # Stem dbh is in centimeters, so the stem radius in meters is dbh / 200
+        reach = radius + self.dbh / 200
+        pad = radius + self.dbh.max() / 200
+
+        # Gather candidate stems from the cells around each segment
+        ux, uy = np.cos(theta), np.sin(theta)
+        x1, y1 = x + length * ux, y + length * uy
+        seg, stem = self.index.query_boxes(
+            np.minimum(x, x1) - pad,
+            np.minimum(y, y1) - pad,
+            np.maximum(x, x1) + pad,
+            np.maximum(y, y1) + pad,
+        )
+
+        # Solve for the distance along each segment at which the footprint
+        # first touches each candidate stem
+        wx, wy = self.x[stem] - x[seg], self.y[stem] - y[seg]
+        along = wx * ux[seg] + wy * uy[seg]
+        perp2 = wx**2 + wy**2 - along**2
+        R2 = reach[stem] ** 2
+        t = along - np.sqrt(np.maximum(R2 - perp2, 0))
+
+        # A stem the footprint already touches is hit immediately. Otherwise,
+        # the stem must lie ahead of the start and within the segment length.
+        touching = wx**2 + wy**2 <= R2
+        t = np.where(touching, 0.0, t)
+        hit = touching | ((perp2 <= R2) & (t >= 0) & (t <= length[seg]))
+        seg, stem, t = seg[hit], stem[hit], t[hit]
+
+        # Keep the closest hit of each segment
+        order = np.lexsort((t, seg))
+        seg, first = np.unique(seg[order], return_index=True)
+        uid[valid[seg]] = self.uid[stem[order][first]].astype(int)
+        distance[valid[seg]] = t[order][first]
+
+        return uid, distance
+
+    def nearest(
+        self,
+        x: np.ndarray | float,
+        y: np.ndarray | float,
+        k: int = 1,
+        cut: bool = None,
+        dbh_min: float = None,
+        dbh_max: float = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest stems to each query position.
+
+        Parameters
+        ----------
+        x : np.ndarray | float
+            X position of each query in meters.
+        y : np.ndarray | float
+            Y position of each query in meters.
+        k : int, optional
+            The number of stems to find for each query.
+        cut : bool, optional
+            Only consider stems whose cut flag matches this value.
+        dbh_min : float, optional
+            Only consider stems with at least this dbh in centimeters.
+        dbh_max : float, optional
+            Only consider stems with at most this dbh in centimeters.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Arrays of shape (n_queries, min(k, n_matching)) holding the row
+            of each stem in the stem map sorted by distance (-1 if the query
+            position is not finite) and its distance in meters (inf in the
+            same case).
+        """
+        mask = np.ones(len(self._stems), dtype=bool)
+        if cut is not None:
+            mask &= self.cut.astype(bool) == cut
+        if dbh_min is not None:
+            mask &= self.dbh >= dbh_min
+        if dbh_max is not None:
+            mask &= self.dbh <= dbh_max
+
+        return self.index.nearest(x, y, k, mask)
+
     def to_json(self) -> dict:
         """
         Return a JSON representation of the stem map.
@@ -223,7 +492,12 @@ class StemMap:
 
 
 def generate_stem_map(
-    width: int, height: int, tph: float, dbh_mu: float, dbh_sigma: float
+    width: int,
+    height: int,
+    tph: float,
+    dbh_mu: float,
+    dbh_sigma: float,
+    seed: int = None,
 ) -> StemMap:
     """
     Generate a random stem map.
@@ -240,6 +514,9 @@ def generate_stem_map(
         Gaussian mean of the dbh distribution.
     dbh_sigma : float
         Gaussian standard deviation of the dbh distribution.
+    seed : int, optional
+        Seed for the random number generator. If not given, the global NumPy
+        random state is used.
 
     Returns
     -------
@@ -252,13 +529,14 @@ def generate_stem_map(
     n_stems = int(width * height * tph / 10000)
 
     # Generate random stem positions and dbh values
+    rng = np.random if seed is None else np.random.RandomState(seed)
     uid = np.arange(n_stems)
-    x = np.random.uniform(0, width, n_stems)
-    y = np.random.uniform(0, height, n_stems)
-    dbh = np.random.normal(dbh_mu, dbh_sigma, n_stems)
+    x = rng.uniform(0, width, n_stems)
+    y = rng.uniform(0, height, n_stems)
+    dbh = rng.normal(dbh_mu, dbh_sigma, n_stems)
     cut = np.zeros(n_stems, dtype=bool)
     # Randomly set 50% of the stems to be marked to cut
-    cut[np.random.choice(n_stems, int(n_stems / 2), replace=False)] = True
+    cut[rng.choice(n_stems, int(n_stems / 2), replace=False)] = True
 
     # Concatenate the arrays into a single array and transpose
-    return StemMap(np.array([uid, x, y, dbh, cut]).T)
+    return StemMap(np.array([uid, x, y, dbh, cut]).T, (0, 0, width, height))
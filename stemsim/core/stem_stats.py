@@ -0,0 +1,139 @@
+from __future__ import annotations
+import numpy as np
+
+
+class StemStats:
+    """
+    Running stand statistics of a stem map, aggregated per tile.
+
+    Stem counts, basal area and dbh histograms are kept per square tile and
+    per cut class (leave or cut). The aggregates are computed once and then
+    updated from the changed stems only, so reading them does not scan the
+    stem map.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        X position of each stem in meters.
+    y : np.ndarray
+        Y position of each stem in meters.
+    dbh : np.ndarray
+        Diameter at breast height of each stem in centimeters.
+    cut : np.ndarray
+        Boolean indicating whether each stem is marked to cut.
+    bounds : tuple[float, float, float, float]
+        The (xmin, ymin, xmax, ymax) extent of the stand in meters.
+    tile_size : float, optional
+        The width of a tile in meters.
+    bin_width : float, optional
+        The width of a dbh histogram bin in centimeters.
+
+    Attributes
+    ----------
+    bounds : tuple[float, float, float, float]
+        The extent of the stand in meters.
+    tile_size : float
+        The width of a tile in meters.
+    bins : np.ndarray
+        The edges of the dbh histogram bins in centimeters.
+    count : np.ndarray
+        Number of stems in each tile and cut class, shape (n_tiles, 2).
+    basal_area : np.ndarray
+        Basal area in square meters in each tile and cut class, shape
+        (n_tiles, 2).
+    histogram : np.ndarray
+        Dbh histogram of each tile and cut class, shape (n_tiles, 2, n_bins).
+
+    Methods
+    -------
+    update(rows, cut)
+        Move stems between cut classes.
+    tiles()
+        Return the extent of each tile.
+    """
+
+    def __init__(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        dbh: np.ndarray,
+        cut: np.ndarray,
+        bounds: tuple[float, float, float, float],
+        tile_size: float = 20.0,
+        bin_width: float = 5.0,
+    ):
+        """Constructor"""
+        self.bounds = tuple(float(b) for b in bounds)
+        self.tile_size = float(tile_size)
+        xmin, ymin, xmax, ymax = self.bounds
+        self._nx = max(int(np.ceil((xmax - xmin) / self.tile_size)), 1)
+        self._ny = max(int(np.ceil((ymax - ymin) / self.tile_size)), 1)
+
+        # Bins start at zero and cover the largest stem
+        n_bins = int(np.max(dbh, initial=0) // bin_width) + 1
+        self.bins = bin_width * np.arange(n_bins + 1)
+
+        # Cache the tile, bin and basal area of every stem for updates
+        ix = np.clip(((x - xmin) // self.tile_size).astype(int), 0, self._nx - 1)
+        iy = np.clip(((y - ymin) // self.tile_size).astype(int), 0, self._ny - 1)
+        self._tile = iy * self._nx + ix
+        self._bin = np.clip((dbh // bin_width).astype(int), 0, n_bins - 1)
+        self._basal_area = np.pi * (dbh / 200) ** 2
+        self._cut = cut.astype(bool)
+
+        n_tiles = self._nx * self._ny
+        self.count = np.zeros((n_tiles, 2), dtype=int)
+        self.basal_area = np.zeros((n_tiles, 2))
+        self.histogram = np.zeros((n_tiles, 2, n_bins), dtype=int)
+        self._add(np.arange(len(x)), self._cut, 1)
+
+    def _add(self, rows: np.ndarray, cut: np.ndarray, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) stems from the cut class given."""
+        tile, cut = self._tile[rows], cut.astype(int)
+        np.add.at(self.count, (tile, cut), sign)
+        np.add.at(self.basal_area, (tile, cut), sign * self._basal_area[rows])
+        np.add.at(self.histogram, (tile, cut, self._bin[rows]), sign)
+
+    def update(self, rows: np.ndarray, cut: np.ndarray) -> None:
+        """
+        Move stems between cut classes.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Unique rows of the stems that changed.
+        cut : np.ndarray
+            The new cut flag of each stem.
+        """
+        cut = np.broadcast_to(np.asarray(cut, dtype=bool), np.shape(rows))
+        changed = self._cut[rows] != cut
+        rows, cut = rows[changed], cut[changed]
+        self._add(rows, ~cut, -1)
+        self._add(rows, cut, 1)
+        self._cut[rows] = cut
+
+    def tiles(self) -> np.ndarray:
+        """
+        Return the extent of each tile, clipped to the stand bounds.
+
+        Returns
+        -------
+        np.ndarray
+            The (xmin, ymin, xmax, ymax) of each tile, shape (n_tiles, 4).
+        """
+        xmin, ymin, xmax, ymax = self.bounds
+        iy, ix = np.divmod(np.arange(self._nx * self._ny), self._nx)
+        x0 = xmin + ix * self.tile_size
+        y0 = ymin + iy * self.tile_size
+        return np.stack(
+            [
+                x0,
+                y0,
+                np.minimum(x0 + self.tile_size, xmax),
+                np.minimum(y0 + self.tile_size, ymax),
+            ],
+            axis=1,
+        )
+
+    def __repr__(self):
+        return f"<StemStats {self._nx}x{self._ny} tiles>"
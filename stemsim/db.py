@@ -1,3 +1,24 @@
+import os
+
+from .core.fleet import Fleet
+from .core.event_log import EventLog
+
 # Simple in-memory storage for objects
 STEM_MAPS = {}
 MACHINES = {}
+
+# Machine poses and camera parameters are stored contiguously in the fleet
+FLEET = Fleet()
+
+# Commands are recorded to an event log when STEMSIM_EVENT_LOG is set
+EVENT_LOG = (
+    EventLog(os.environ["STEMSIM_EVENT_LOG"])
+    if os.environ.get("STEMSIM_EVENT_LOG")
+    else None
+)
+
+
+def log_event(kind: int, target: str, ref: str = None, args: tuple = ()) -> None:
+    """Record an event if event logging is enabled."""
+    if EVENT_LOG is not None:
+        EVENT_LOG.append(kind, target, ref, args)
@@ -0,0 +1,302 @@
+"""
+Load-testing harness that simulates a fleet of AR clients.
+
+Starts the API in a subprocess and spawns simulated clients that follow the
+pattern of example/demo.py: create a stem map, create a machine, set its pose
+and then loop over move and local-stems requests at a fixed rate. Reports the
+sustained request rate, latency percentiles per endpoint, event loop lag and
+server memory growth.
+
+Usage:
+
+    python -m stemsim.loadtest --clients 50 --rate 10 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+
+# =============================================================================
+# Server
+# =============================================================================
+def _rss() -> float:
+    """Resident set size of the current process in megabytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Fall back to the peak resident set size, reported in kilobytes on
+        # Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+async def _monitor(interval: float) -> None:
+    """Periodically print event loop lag and memory usage as JSON lines."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        print(json.dumps({"time": time.time(), "lag": lag, "rss": _rss()}), flush=True)
+
+
+def serve(port: int, interval: float) -> None:
+    """Run the API with the event loop and memory monitor."""
+    import uvicorn
+    from .main import app
+
+    async def main():
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        monitor = asyncio.create_task(_monitor(interval))
+        await uvicorn.Server(config).serve()
+        monitor.cancel()
+
+    asyncio.run(main())
+
+
+# =============================================================================
+# Clients
+# =============================================================================
+class Client(threading.Thread):
+    """
+    A simulated AR client following the pattern of example/demo.py.
+
+    Parameters
+    ----------
+    base_url : str
+        The base URL of the API.
+    args : argparse.Namespace
+        The load test settings.
+    stem_map_id : str, optional
+        A stem map to share with other clients. If not given, the client
+        creates its own stem map.
+    """
+
+    def __init__(self, base_url: str, args: argparse.Namespace, stem_map_id=None):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.args = args
+        self.stem_map_id = stem_map_id
+        self.samples = []
+        self.errors = 0
+        self.stop = threading.Event()
+        self._session = requests.Session()
+
+    def _request(self, method: str, endpoint: str, path: str, **kwargs) -> dict:
+        """Send a request and record its latency under the endpoint name."""
+        start = time.perf_counter()
+        try:
+            response = self._session.request(method, self.base_url + path, **kwargs)
+            ok = response.ok
+        except requests.RequestException:
+            response, ok = None, False
+        self.samples.append((endpoint, time.time(), time.perf_counter() - start))
+        if not ok:
+            self.errors += 1
+            return None
+        return response.json()
+
+    def run(self) -> None:
+        args = self.args
+        if self.stem_map_id is None:
+            stem_map = self._request(
+                "POST",
+                "POST /stem-maps",
+                "/stem-maps",
+                json={
+                    "width": args.width,
+                    "height": args.height,
+                    "tph": args.tph,
+                    "dbh_mu": 25,
+                    "dbh_sigma": 1,
+                },
+            )
+            if stem_map is None:
+                return
+            self.stem_map_id = stem_map["stem_map_id"]
+
+        machine = self._request(
+            "POST",
+            "POST /machines",
+            "/machines",
+            json={
+                "stem_map_id": self.stem_map_id,
+                "camera_max_dist": args.max_dist,
+                "camera_fov": np.deg2rad(args.fov),
+            },
+        )
+        if machine is None:
+            return
+        machine_id = machine["machine_id"]
+        self._request(
+            "PATCH",
+            "PATCH /machines/{id}/pose",
+            f"/machines/{machine_id}/pose",
+            json={"x": args.width / 2, "y": 0, "theta": np.pi / 2},
+        )
+
+        # Turn around at random so the machine wanders around the stem map
+        rng = np.random.default_rng()
+        period = 1 / args.rate
+        next_tick = time.perf_counter()
+        while not self.stop.is_set():
+            self._request(
+                "PATCH",
+                "PATCH /machines/{id}/move",
+                f"/machines/{machine_id}/move",
+                json={"distance": 1, "rotation": float(rng.normal(0, 0.3))},
+            )
+            self._request(
+                "GET",
+                "GET /machines/{id}/local-stems",
+                f"/machines/{machine_id}/local-stems",
+            )
+            next_tick += period
+            self.stop.wait(max(next_tick - time.perf_counter(), 0))
+
+
+# =============================================================================
+# Report
+# =============================================================================
+def report(clients: list[Client], monitor: list[dict], start: float, end: float):
+    """Print a summary of the load test."""
+    samples = [sample for client in clients for sample in client.samples]
+    steady = [s for s in samples if start <= s[1] <= end]
+    errors = sum(client.errors for client in clients)
+    print(f"\nclients: {len(clients)}  requests: {len(samples)}  errors: {errors}")
+    print(f"sustained throughput: {len(steady) / (end - start):.1f} requests/s")
+
+    print(f"\n{'endpoint':<34}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}", end="")
+    print(f"{'p99 ms':>10}{'max ms':>10}")
+    for endpoint in sorted({s[0] for s in samples}):
+        latency = 1000 * np.array([s[2] for s in samples if s[0] == endpoint])
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        print(f"{endpoint:<34}{len(latency):>8}{p50:>10.1f}{p90:>10.1f}", end="")
+        print(f"{p99:>10.1f}{latency.max():>10.1f}")
+
+    if monitor:
+        lag = 1000 * np.array([m["lag"] for m in monitor])
+        p50, p99 = np.percentile(lag, [50, 99])
+        print(f"\nevent loop lag: p50 {p50:.1f} ms  p99 {p99:.1f} ms", end="")
+        print(f"  max {lag.max():.1f} ms")
+
+        print(f"\n{'elapsed s':>10}{'rss MB':>10}")
+        step = max(len(monitor) // 10, 1)
+        for m in monitor[::step] + monitor[-1:]:
+            print(f"{m['time'] - monitor[0]['time']:>10.1f}{m['rss']:>10.1f}")
+        growth = monitor[-1]["rss"] - monitor[0]["rss"]
+        print(f"server memory growth: {growth:+.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=10, help="number of clients")
+    parser.add_argument(
+        "--rate", type=float, default=5, help="move + local-stems cycles/s per client"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="seconds to sustain the load"
+    )
+    parser.add_argument(
+        "--ramp", type=float, default=5, help="seconds over which to start clients"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--tph", type=float, default=1000)
+    parser.add_argument("--max-dist", type=float, default=20)
+    parser.add_argument("--fov", type=float, default=110, help="degrees")
+    parser.add_argument(
+        "--shared-map", action="store_true", help="all clients share one stem map"
+    )
+    parser.add_argument(
+        "--monitor-interval", type=float, default=0.1, help="seconds between samples"
+    )
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.monitor_interval)
+        return
+
+    # Start the server and collect its monitor samples in the background
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "stemsim.loadtest",
+            "--serve",
+            "--port",
+            str(args.port),
+            "--monitor-interval",
+            str(args.monitor_interval),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    monitor = []
+    reader = threading.Thread(
+        target=lambda: monitor.extend(json.loads(line) for line in server.stdout),
+        daemon=True,
+    )
+    reader.start()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        # Wait for the server to accept requests
+        while True:
+            try:
+                requests.get(f"{base_url}/stem-maps", timeout=1)
+                break
+            except requests.ConnectionError:
+                if server.poll() is not None:
+                    sys.exit("Server failed to start")
+                time.sleep(0.1)
+
+        stem_map_id = None
+        if args.shared_map:
+            stem_map_id = requests.post(
+                f"{base_url}/stem-maps",
+                json={
+                    "width": args.width,
+                    "height": args.height,
+                    "tph": args.tph,
+                    "dbh_mu": 25,
+                    "dbh_sigma": 1,
+                },
+            ).json()["stem_map_id"]
+
+        # Ramp up the clients, then hold the full load for the duration
+        clients = [Client(base_url, args, stem_map_id) for _ in range(args.clients)]
+        for client in clients:
+            client.start()
+            time.sleep(args.ramp / max(args.clients, 1))
+        start = time.time()
+        time.sleep(args.duration)
+        end = time.time()
+
+        for client in clients:
+            client.stop.set()
+        for client in clients:
+            client.join()
+    finally:
+        server.terminate()
+        server.wait()
+        reader.join(timeout=1)
+
+    report(clients, monitor, start, end)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import numpy as np
 import uvicorn
 
 from .routers import stem_map_router, machine_router
+from .db import EVENT_LOG
 
-app = FastAPI(title="StemSim", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write any buffered events before the server exits, off the event loop
+    if EVENT_LOG is not None:
+        await asyncio.to_thread(EVENT_LOG.close)
+
+
+app = FastAPI(title="StemSim", version="0.1.0", lifespan=lifespan)
 
 # Connect API routers to the main app
 app.include_router(stem_map_router.router, prefix="/stem-maps", tags=["Stem Maps"])
@@ -1,11 +1,26 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
 from uuid import uuid4
+import numpy as np
 
-from ..core.machine import Machine
-from ..core.devices import Camera, GNSS
-from .stem_map_router import GetStemMap, stem_map_to_json
-from ..db import MACHINES, STEM_MAPS
+from ..core.devices import Camera, GNSS, Sensor, SensorNoise
+from .stem_map_router import GetStem, GetStemMap, stem_map_to_json
+from ..core.event_log import (
+    CREATE_MACHINE,
+    SET_POSE,
+    MOVE,
+    CLEAR_SENSORS,
+    ADD_SENSOR,
+    encode_name,
+)
+from ..db import MACHINES, STEM_MAPS, FLEET, log_event
+
+# Upper bound on the noise realizations of one trials request, since each
+# trial holds a copy of the visible stems in memory
+MAX_TRIALS = 1000
+
+# Upper bound on the stems returned by one nearest request
+MAX_NEAREST = 1000
 
 
 # =============================================================================
@@ -24,10 +39,42 @@ class GetMachine(BaseModel):
     gnss_y: float
 
 
+class SetSensorNoise(BaseModel):
+    gnss_sigma: float = Field(0.0, ge=0)
+    detection_near: float = Field(1.0, ge=0, le=1)
+    detection_far: float = Field(1.0, ge=0, le=1)
+    dbh_sigma: float = Field(0.0, ge=0)
+    seed: int | None = Field(None, ge=0)
+
+
+class SetSensor(BaseModel):
+    max_dist: float
+    fov: float
+    x: float = 0.0
+    y: float = 0.0
+    theta: float = 0.0
+    name: str = ""
+
+
+class ListSetSensors(BaseModel):
+    sensors: list[SetSensor]
+
+
 class CreateMachine(BaseModel):
     stem_map_id: str
     camera_max_dist: float
     camera_fov: float
+    noise: SetSensorNoise | None = None
+    sensors: list[SetSensor] = []
+
+
+class GetSensorStems(BaseModel):
+    name: str
+    stems: list[GetStem]
+
+
+class ListSensorStems(BaseModel):
+    sensors: list[GetSensorStems]
 
 
 class SetPose(BaseModel):
@@ -41,6 +88,51 @@ class MoveMachine(BaseModel):
     rotation: float
 
 
+class GetTrial(BaseModel):
+    gnss_x: float
+    gnss_y: float
+    stems: list[GetStem]
+
+
+class ListTrials(BaseModel):
+    trials: list[GetTrial]
+
+
+class CheckClearance(BaseModel):
+    radius: float
+    moves: list[MoveMachine]
+
+
+class Clearance(BaseModel):
+    clear: bool
+    stem_uid: int | None = None
+    distance: float | None = None
+
+
+class ListClearances(BaseModel):
+    clearances: list[Clearance]
+
+
+class NearestStem(GetStem):
+    distance: float
+
+
+class ListNearestStems(BaseModel):
+    stems: list[NearestStem]
+
+
+class MoveFleetMachine(MoveMachine):
+    machine_id: str
+
+
+class MoveFleet(BaseModel):
+    moves: list[MoveFleetMachine]
+
+
+class ListGetMachines(BaseModel):
+    machines: list[GetMachine]
+
+
 # =============================================================================
 # API Endpoints
 # =============================================================================
@@ -72,8 +164,19 @@ async def create_machine(new_machine: CreateMachine) -> GetMachine:
     camera = Camera(0, new_machine.camera_max_dist, new_machine.camera_fov)
     gnss = GNSS(0, 0)
     stem_map = STEM_MAPS[new_machine.stem_map_id]
-    machine = Machine(stem_map, camera, gnss)
+    noise = None
+    if new_machine.noise is not None:
+        noise = SensorNoise(**new_machine.noise.model_dump())
+    sensors = [Sensor(**sensor.model_dump()) for sensor in new_machine.sensors]
+    machine = FLEET.add(stem_map, camera, gnss, noise, sensors)
     MACHINES[machine_id] = machine
+    log_event(
+        CREATE_MACHINE,
+        machine_id,
+        new_machine.stem_map_id,
+        (new_machine.camera_max_dist, new_machine.camera_fov),
+    )
+    log_sensors(machine_id, sensors)
     return GetMachine(
         machine_id=machine_id,
         camera_max_dist=new_machine.camera_max_dist,
@@ -84,10 +187,41 @@ async def create_machine(new_machine: CreateMachine) -> GetMachine:
     )
 
 
+@router.patch("/move")
+async def move_fleet(fleet_move: MoveFleet) -> ListGetMachines:
+    machine_ids = [move.machine_id for move in fleet_move.moves]
+    if len(set(machine_ids)) != len(machine_ids):
+        raise HTTPException(
+            status_code=422, detail="Each machine can only be moved once per batch"
+        )
+    machines = [MACHINES[move.machine_id] for move in fleet_move.moves]
+    FLEET.move(
+        np.array([move.distance for move in fleet_move.moves]),
+        np.array([move.rotation for move in fleet_move.moves]),
+        np.array([FLEET.slot(machine) for machine in machines], dtype=int),
+    )
+    for move in fleet_move.moves:
+        log_event(MOVE, move.machine_id, args=(move.distance, move.rotation))
+    return ListGetMachines(
+        machines=[
+            GetMachine(
+                machine_id=move.machine_id,
+                camera_max_dist=machine.camera.max_dist,
+                camera_fov=machine.camera.fov,
+                camera_theta=machine.camera.theta,
+                gnss_x=machine.gnss.x,
+                gnss_y=machine.gnss.y,
+            )
+            for move, machine in zip(fleet_move.moves, machines)
+        ]
+    )
+
+
 @router.patch("/{machine_id}/pose")
 async def set_pose(machine_id: str, new_pose: SetPose) -> GetMachine:
     machine = MACHINES[machine_id]
     machine.pose = (new_pose.x, new_pose.y, new_pose.theta)
+    log_event(SET_POSE, machine_id, args=(new_pose.x, new_pose.y, new_pose.theta))
     return GetMachine(
         machine_id=machine_id,
         camera_max_dist=machine.camera.max_dist,
@@ -102,6 +236,7 @@ async def set_pose(machine_id: str, new_pose: SetPose) -> GetMachine:
 async def move_machine(machine_id: str, move: MoveMachine) -> GetMachine:
     machine = MACHINES[machine_id]
     machine.move(move.distance, move.rotation)
+    log_event(MOVE, machine_id, args=(move.distance, move.rotation))
     return GetMachine(
         machine_id=machine_id,
         camera_max_dist=machine.camera.max_dist,
@@ -117,3 +252,98 @@ async def get_stems_from_camera(machine_id: str) -> GetStemMap:
     machine = MACHINES[machine_id]
     local_stems = stem_map_to_json(machine.get_local_stems())
     return GetStemMap(stem_map_id=None, stems=local_stems)
+
+
+@router.get("/{machine_id}/local-stems/trials")
+async def get_stem_trials_from_camera(
+    machine_id: str, n_trials: int = Query(1, ge=1, le=MAX_TRIALS)
+) -> ListTrials:
+    machine = MACHINES[machine_id]
+    stem_maps, gnss = machine.sample_local_stems(n_trials)
+    return ListTrials(
+        trials=[
+            GetTrial(gnss_x=x, gnss_y=y, stems=stem_map_to_json(stem_map))
+            for stem_map, (x, y) in zip(stem_maps, gnss)
+        ]
+    )
+
+
+@router.put("/{machine_id}/sensors")
+async def set_sensors(machine_id: str, new_sensors: ListSetSensors) -> ListSetSensors:
+    machine = MACHINES[machine_id]
+    machine.sensors = [Sensor(**sensor.model_dump()) for sensor in new_sensors.sensors]
+    log_event(CLEAR_SENSORS, machine_id)
+    log_sensors(machine_id, machine.sensors)
+    return new_sensors
+
+
+@router.get("/{machine_id}/sensor-stems")
+async def get_stems_from_sensors(machine_id: str) -> ListSensorStems:
+    machine = MACHINES[machine_id]
+    return ListSensorStems(
+        sensors=[
+            GetSensorStems(name=sensor.name, stems=stem_map_to_json(stem_map))
+            for sensor, stem_map in zip(machine.sensors, machine.get_sensor_stems())
+        ]
+    )
+
+
+@router.post("/{machine_id}/clearance")
+async def check_clearance(machine_id: str, check: CheckClearance) -> ListClearances:
+    machine = MACHINES[machine_id]
+    uid, distance = machine.check_clearance(
+        np.array([move.distance for move in check.moves]),
+        np.array([move.rotation for move in check.moves]),
+        check.radius,
+    )
+    return ListClearances(
+        clearances=[
+            (
+                Clearance(clear=True)
+                if stem_uid < 0
+                else Clearance(clear=False, stem_uid=int(stem_uid), distance=float(d))
+            )
+            for stem_uid, d in zip(uid, distance)
+        ]
+    )
+
+
+@router.get("/{machine_id}/nearest")
+async def get_nearest_stems(
+    machine_id: str,
+    k: int = Query(1, ge=0, le=MAX_NEAREST),
+    cut: bool | None = None,
+    dbh_min: float | None = None,
+    dbh_max: float | None = None,
+) -> ListNearestStems:
+    machine = MACHINES[machine_id]
+    stem_map, distance = machine.get_nearest_stems(k, cut, dbh_min, dbh_max)
+    return ListNearestStems(
+        stems=[
+            NearestStem(**stem.model_dump(), distance=float(d))
+            for stem, d in zip(stem_map_to_json(stem_map), distance)
+        ]
+    )
+
+
+# =============================================================================
+# Helper Functions
+# =============================================================================
+def log_sensors(machine_id: str, sensors: list[Sensor]) -> None:
+    """
+    Helper function to record the sensors mounted on a machine.
+
+    Parameters
+    ----------
+    machine_id : str
+        The id of the machine.
+    sensors : list[Sensor]
+        The sensors added to the machine.
+    """
+    for sensor in sensors:
+        log_event(
+            ADD_SENSOR,
+            machine_id,
+            encode_name(sensor.name),
+            (sensor.max_dist, sensor.fov, sensor.x, sensor.y, sensor.theta),
+        )
@@ -1,9 +1,11 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import uuid4
+import numpy as np
 
 from ..core.stem_map import generate_stem_map, StemMap
-from ..db import STEM_MAPS
+from ..core.event_log import CREATE_STEM_MAP, SET_CUT
+from ..db import STEM_MAPS, log_event
 
 
 # =============================================================================
@@ -32,6 +34,37 @@ class CreateStemMap(BaseModel):
     tph: float
     dbh_mu: float
     dbh_sigma: float
+    seed: int | None = Field(None, ge=0, lt=2**32)
+
+
+class GetClassStats(BaseModel):
+    stems: int
+    tph: float
+    basal_area: float
+    dbh_histogram: list[int]
+
+
+class GetRegionStats(BaseModel):
+    xmin: float
+    ymin: float
+    xmax: float
+    ymax: float
+    area: float
+    all: GetClassStats
+    cut: GetClassStats
+    leave: GetClassStats
+
+
+class GetStemMapStats(BaseModel):
+    stem_map_id: str
+    dbh_bins: list[float]
+    stand: GetRegionStats
+    tiles: list[GetRegionStats] | None = None
+
+
+class SetCut(BaseModel):
+    uids: list[int]
+    cut: bool
 
 
 # =============================================================================
@@ -54,18 +87,72 @@ async def list_stem_maps() -> ListStemMaps:
 @router.post("")
 async def create_stem_map(new_stem_map: CreateStemMap) -> GetStemMap:
     stem_map_id = uuid4().hex
+    # Always generate from an explicit seed so the map can be replayed
+    seed = new_stem_map.seed
+    if seed is None:
+        seed = int(np.random.randint(2**31))
     stem_map = generate_stem_map(
         new_stem_map.width,
         new_stem_map.height,
         new_stem_map.tph,
         new_stem_map.dbh_mu,
         new_stem_map.dbh_sigma,
+        seed,
     )
     STEM_MAPS[stem_map_id] = stem_map
+    # Build the running stats now so the stats endpoint never scans the map
+    stem_map.build_stats()
+    log_event(
+        CREATE_STEM_MAP,
+        stem_map_id,
+        args=(
+            new_stem_map.width,
+            new_stem_map.height,
+            new_stem_map.tph,
+            new_stem_map.dbh_mu,
+            new_stem_map.dbh_sigma,
+            seed,
+        ),
+    )
     stem_map = stem_map_to_json(stem_map)
     return GetStemMap(stem_map_id=stem_map_id, stems=stem_map)
 
 
+@router.get("/{stem_map_id}/stats")
+async def get_stem_map_stats(stem_map_id: str, tiles: bool = False) -> GetStemMapStats:
+    stats = STEM_MAPS[stem_map_id].stats
+    return GetStemMapStats(
+        stem_map_id=stem_map_id,
+        dbh_bins=stats.bins.tolist(),
+        stand=region_stats(
+            stats.bounds,
+            stats.count.sum(axis=0),
+            stats.basal_area.sum(axis=0),
+            stats.histogram.sum(axis=0),
+        ),
+        tiles=(
+            [
+                region_stats(*region)
+                for region in zip(
+                    stats.tiles(), stats.count, stats.basal_area, stats.histogram
+                )
+            ]
+            if tiles
+            else None
+        ),
+    )
+
+
+@router.patch("/{stem_map_id}/cut")
+async def set_cut(stem_map_id: str, new_cut: SetCut) -> GetStemMap:
+    stem_map = STEM_MAPS[stem_map_id]
+    stem_map.set_cut(new_cut.uids, new_cut.cut)
+    for uid in new_cut.uids:
+        log_event(SET_CUT, stem_map_id, args=(uid, new_cut.cut))
+    changed = StemMap(stem_map._stems[stem_map.rows(new_cut.uids)])
+    return GetStemMap(stem_map_id=stem_map_id, stems=stem_map_to_json(changed))
+
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
@@ -93,3 +180,52 @@ def stem_map_to_json(stem_map: StemMap) -> GetStemMap:
         )
         for stem in stem_map._stems
     ]
+
+
+def region_stats(
+    bounds: tuple[float, float, float, float],
+    count: np.ndarray,
+    basal_area: np.ndarray,
+    histogram: np.ndarray,
+) -> GetRegionStats:
+    """
+    Helper function to convert the aggregates of a region to a GetRegionStats
+    object.
+
+    Parameters
+    ----------
+    bounds : tuple[float, float, float, float]
+        The (xmin, ymin, xmax, ymax) extent of the region in meters.
+    count : np.ndarray
+        Number of leave and cut stems.
+    basal_area : np.ndarray
+        Basal area of leave and cut stems in square meters.
+    histogram : np.ndarray
+        Dbh histograms of leave and cut stems.
+
+    Returns
+    -------
+    GetRegionStats
+        The stand statistics of the region, per hectare.
+    """
+    xmin, ymin, xmax, ymax = (float(b) for b in bounds)
+    hectares = max((xmax - xmin) * (ymax - ymin), 1e-9) / 10000
+
+    def class_stats(count, basal_area, histogram):
+        return GetClassStats(
+            stems=int(count),
+            tph=float(count / hectares),
+            basal_area=float(basal_area / hectares),
+            dbh_histogram=histogram.tolist(),
+        )
+
+    return GetRegionStats(
+        xmin=xmin,
+        ymin=ymin,
+        xmax=xmax,
+        ymax=ymax,
+        area=hectares,
+        all=class_stats(count.sum(), basal_area.sum(), histogram.sum(axis=0)),
+        cut=class_stats(count[1], basal_area[1], histogram[1]),
+        leave=class_stats(count[0], basal_area[0], histogram[0]),
+    )
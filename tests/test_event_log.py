@@ -0,0 +1,121 @@
+import time
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from stemsim.core import Camera, Fleet, GNSS, generate_stem_map
+from stemsim.core.event_log import (
+    CREATE_MACHINE,
+    CREATE_STEM_MAP,
+    MOVE,
+    SET_CUT,
+    SET_POSE,
+    EventLog,
+    read_event_log,
+    replay,
+)
+
+
+def snapshot(stem_maps, machines):
+    return (
+        {k: stem_map.cut.copy() for k, stem_map in stem_maps.items()},
+        {k: machine.pose for k, machine in machines.items()},
+    )
+
+
+def assert_state(replayed, expected):
+    stem_maps, machines, _ = replayed
+    cuts, poses = expected
+    assert stem_maps.keys() == cuts.keys()
+    assert machines.keys() == poses.keys()
+    for k, cut in cuts.items():
+        assert np.array_equal(stem_maps[k].cut, cut)
+    for k, pose in poses.items():
+        x, y, theta = machines[k].pose
+        assert np.allclose((x, y), pose[:2])
+        assert np.isclose(np.cos(theta), np.cos(pose[2]))
+        assert np.isclose(np.sin(theta), np.sin(pose[2]))
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    """Log a mixed session the same way the API routes do."""
+    path = str(tmp_path_factory.mktemp("log") / "events.log")
+    log = EventLog(path, buffer_size=64, sync_interval=0.05)
+    rng = np.random.default_rng(0)
+    fleet = Fleet(capacity=2)
+    stem_maps, machines = {}, {}
+
+    for seed in range(2):
+        stem_map_id = uuid4().hex
+        stem_maps[stem_map_id] = generate_stem_map(50, 50, 400, 25, 5, seed)
+        log.append(CREATE_STEM_MAP, stem_map_id, args=(50, 50, 400, 25, 5, seed))
+    for i in range(8):
+        machine_id = uuid4().hex
+        stem_map_id = list(stem_maps)[i % 2]
+        machines[machine_id] = fleet.add(
+            stem_maps[stem_map_id], Camera(0, 20, 2), GNSS(0, 0)
+        )
+        log.append(CREATE_MACHINE, machine_id, stem_map_id, (20, 2))
+
+    def step():
+        machine_id = rng.choice(list(machines))
+        machine = machines[machine_id]
+        r = rng.random()
+        if r < 0.1:
+            pose = tuple(rng.uniform(-5, 55, 2)) + (rng.uniform(-7, 7),)
+            machine.pose = pose
+            log.append(SET_POSE, machine_id, args=pose)
+        elif r < 0.2:
+            stem_map_id = rng.choice(list(stem_maps))
+            uid = rng.integers(0, 100, 4)
+            cut = rng.random() < 0.5
+            stem_maps[stem_map_id].set_cut(uid, cut)
+            for u in uid:
+                log.append(SET_CUT, stem_map_id, args=(u, cut))
+        elif r < 0.3:
+            ids = rng.choice(list(machines), 3, replace=False)
+            distance, rotation = rng.uniform(-2, 2, 3), rng.uniform(-1, 1, 3)
+            fleet.move(distance, rotation, [fleet.slot(machines[i]) for i in ids])
+            for i, d, rot in zip(ids, distance, rotation):
+                log.append(MOVE, i, args=(d, rot))
+        else:
+            d, rot = rng.uniform(-2, 2), rng.uniform(-1, 1)
+            machine.move(d, rot)
+            log.append(MOVE, machine_id, args=(d, rot))
+
+    for _ in range(300):
+        step()
+
+    # Leave a gap in the timestamps so the middle of the session is exact
+    log.flush()
+    time.sleep(0.02)
+    middle = time.time()
+    middle_state = snapshot(stem_maps, machines)
+    time.sleep(0.02)
+
+    for _ in range(300):
+        step()
+
+    # Let the writer thread flush on its own before closing
+    time.sleep(0.2)
+    log.close()
+    return path, middle, middle_state, snapshot(stem_maps, machines)
+
+
+def test_event_log_writes_every_record(session):
+    path, *_ = session
+    assert sum(len(chunk) for chunk in read_event_log(path)) > 600
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_replay_reproduces_live_state(session, chunk_size):
+    path, _, _, final_state = session
+    assert_state(replay(path, chunk_size=chunk_size), final_state)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_replay_until_middle_of_session(session, chunk_size):
+    path, middle, middle_state, _ = session
+    assert_state(replay(path, until=middle, chunk_size=chunk_size), middle_state)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from stemsim.core import Camera, Fleet, GNSS, Machine, generate_stem_map
+
+
+def test_fleet_move_matches_machine_move():
+    stem_map = generate_stem_map(100, 100, 100, 25, 2, seed=0)
+    rng = np.random.default_rng(0)
+    fleet = Fleet(capacity=2)
+    machines, references = [], []
+    for _ in range(10):
+        x, y, theta = rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 6)
+        machines.append(fleet.add(stem_map, Camera(theta, 20, 2), GNSS(x, y)))
+        references.append(Machine(stem_map, Camera(theta, 20, 2), GNSS(x, y)))
+
+    # Move a subset of the fleet in a few batches
+    for _ in range(5):
+        index = rng.choice(10, 6, replace=False)
+        distance = rng.uniform(-3, 3, 6)
+        rotation = rng.uniform(-1, 1, 6)
+        fleet.move(distance, rotation, index)
+        for i, d, r in zip(index, distance, rotation):
+            references[i].move(d, r)
+
+    for machine, reference in zip(machines, references):
+        assert np.allclose(machine.pose, reference.pose)
+
+
+def test_fleet_move_rejects_bad_slots():
+    fleet = Fleet()
+    fleet.add(None, Camera(0, 20, 2), GNSS(0, 0))
+
+    with pytest.raises(IndexError):
+        fleet.move(5.0, 0.0, [3])
+    with pytest.raises(IndexError):
+        fleet.move(5.0, 0.0, [-1])
+    with pytest.raises(ValueError):
+        fleet.move(5.0, 0.0, [0, 0])
@@ -0,0 +1,41 @@
+import numpy as np
+
+from stemsim.core import Camera, GNSS, Machine, Sensor, generate_stem_map
+
+
+def test_zero_offset_sensor_matches_camera():
+    stem_map = generate_stem_map(100, 100, 600, 25, 5, seed=2)
+    machine = Machine(stem_map, Camera(0.7, 15, 2), GNSS(40, 60))
+    machine.sensors = [Sensor(15, 2)]
+
+    (stems,) = machine.get_sensor_stems()
+    expected = machine.get_local_stems()
+
+    assert np.array_equal(stems.uid, expected.uid)
+    assert np.allclose(stems.x, expected.x)
+    assert np.allclose(stems.y, expected.y)
+
+
+def test_mounted_sensors_match_camera_at_mounted_pose():
+    stem_map = generate_stem_map(100, 100, 600, 25, 5, seed=3)
+    sensors = [
+        Sensor(12, 1.5, 2.0, 0.0, 0.0, "front"),
+        Sensor(8, 1.0, -1.5, 1.0, np.pi, "rear"),
+        Sensor(10, 0.8, 0.5, -1.0, -np.pi / 2, "right"),
+        Sensor(6, 2 * np.pi, 0.0, 0.5, 0.0, "roof"),
+    ]
+    machine = Machine(stem_map, Camera(0, 0, 0), GNSS(0, 0), sensors=sensors)
+    rng = np.random.default_rng(3)
+
+    for _ in range(20):
+        x, y, theta = *rng.uniform(10, 90, 2), rng.uniform(-np.pi, 3 * np.pi)
+        machine.pose = (x, y, theta)
+
+        for sensor, stems in zip(sensors, machine.get_sensor_stems()):
+            # Place a camera at the sensor's world pose
+            sx = x + np.cos(theta) * sensor.x - np.sin(theta) * sensor.y
+            sy = y + np.sin(theta) * sensor.x + np.cos(theta) * sensor.y
+            camera = Camera(theta + sensor.theta, sensor.max_dist, sensor.fov)
+            expected = Machine(stem_map, camera, GNSS(sx, sy)).get_local_stems()
+
+            assert np.array_equal(stems.uid, expected.uid), sensor.name
@@ -0,0 +1,59 @@
+import numpy as np
+
+from stemsim.core import Camera, GNSS, Machine, StemMap
+
+
+def test_sweep_reverse_hits_stem_behind():
+    # A 20 cm stem 5 m behind the start of the segment
+    stem_map = StemMap(np.array([[7, -5.0, 0.0, 20.0, 0]]))
+
+    uid, distance = stem_map.sweep(0, 0, 0.0, -10, 1)
+    expected_uid, expected_distance = stem_map.sweep(0, 0, np.pi, 10, 1)
+
+    assert uid[0] == expected_uid[0] == 7
+    assert np.isclose(distance[0], expected_distance[0])
+    assert np.isclose(distance[0], 3.9)
+
+
+def test_check_clearance_reverse_move():
+    stem_map = StemMap(np.array([[7, -5.0, 0.0, 20.0, 0]]))
+    machine = Machine(stem_map, Camera(0, 20, 2), GNSS(0, 0))
+
+    uid, distance = machine.check_clearance([10, -10], [0, 0], 1)
+
+    assert uid.tolist() == [-1, 7]
+    assert np.isinf(distance[0])
+    assert np.isclose(distance[1], 3.9)
+
+
+def test_nearest_non_finite_query_and_empty_k():
+    stem_map = StemMap(np.array([[0, 1.0, 1.0, 20.0, 0], [1, 5.0, 5.0, 20.0, 1]]))
+
+    index, distance = stem_map.nearest([np.nan, 0.0], [0.0, 0.0], 1)
+    assert index.tolist() == [[-1], [0]]
+    assert np.isinf(distance[0, 0])
+
+    index, distance = stem_map.nearest(0.0, 0.0, 0)
+    assert index.shape == distance.shape == (1, 0)
+
+
+def test_sweep_non_finite_segments_are_clear():
+    stem_map = StemMap(np.array([[7, 5.0, 0.0, 20.0, 0]]))
+
+    uid, distance = stem_map.sweep(
+        [0, np.nan, 0, 0], [0, 0, 0, 0], [0, 0, np.nan, 0], [10, 10, 10, np.inf], 1
+    )
+
+    assert uid.tolist() == [7, -1, -1, -1]
+    assert np.isclose(distance[0], 3.9)
+    assert np.isinf(distance[1:]).all()
+
+
+def test_nearest_clamps_k_to_eligible_stems():
+    stem_map = StemMap(np.array([[0, 1.0, 1.0, 20.0, 0], [1, 5.0, 5.0, 20.0, 1]]))
+
+    index, distance = stem_map.nearest([0.0, 6.0], [0.0, 6.0], 10**9)
+    assert index.tolist() == [[0, 1], [1, 0]]
+
+    index, distance = stem_map.nearest(0.0, 0.0, 10**9, cut=True)
+    assert index.tolist() == [[1]]
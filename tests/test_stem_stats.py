@@ -0,0 +1,25 @@
+import numpy as np
+
+from stemsim.core import generate_stem_map
+
+
+def test_set_cut_keeps_stats_equal_to_rebuild():
+    stem_map = generate_stem_map(100, 60, 600, 25, 8, seed=1)
+    stats = stem_map.stats
+    rng = np.random.default_rng(1)
+
+    for _ in range(50):
+        # Repeat uids within a call and mark stems that are already marked
+        uid = rng.choice(stem_map.uid, 40)
+        cut = rng.random(len(uid)) < 0.5
+        stem_map.set_cut(uid, cut)
+        stem_map.set_cut(uid[:5], True)
+
+        # Each stem is counted exactly once, in its current cut class
+        assert stats.count.sum() == len(stem_map.uid)
+        assert stats.count[:, 1].sum() == np.count_nonzero(stem_map.cut)
+
+    fresh = stem_map.build_stats()
+    assert np.array_equal(stats.count, fresh.count)
+    assert np.allclose(stats.basal_area, fresh.basal_area)
+    assert np.array_equal(stats.histogram, fresh.histogram)